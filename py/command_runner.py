@@ -24,6 +24,9 @@ from config import PROJECT_ROOT
 
 logger = logging.getLogger(__name__)
 
+# Most bytes taken from the process's output per read
+READ_CHUNK_SIZE = 65536
+
 
 """ For the high perfromance code, optional temperature tracking.
 Unfortunately thsi just reports 0 degrees C or with other attempts, 'Nominal'
@@ -58,6 +61,10 @@ class OutputFilter:
             buffer_sizes: Dict mapping category names to buffer sizes (default: 30 for all)
         """
         self.prefixes = prefixes
+        # One anchored alternation of all the prefixes, tried in dict order
+        # like a startswith() per prefix, but in a single match call
+        self.category_by_prefix = {prefix: category for category, prefix in reversed(prefixes.items())}
+        self.prefix_pattern = re.compile('|'.join(re.escape(prefix) for prefix in prefixes.values())) if prefixes else None
         self.buffers = {}
         self.latest = {}  # Store latest line for each category
         
@@ -75,9 +82,9 @@ class OutputFilter:
         Returns:
             Tuple of (category, line) where category is the matched category or 'other'
         """
-        for category, prefix in self.prefixes.items():
-            if line.startswith(prefix):
-                return category, line
+        match = self.prefix_pattern.match(line) if self.prefix_pattern else None
+        if match:
+            return self.category_by_prefix[match.group()], line
         return 'other', line
     
     def add_line(self, line: str) -> Tuple[str, str]:
@@ -281,6 +288,17 @@ class CommandRunner:
         Yields:
             Lines of output from stdout
         """
+        for lines in self.read_output_batches():
+            yield from lines
+
+    def read_output_batches(self):
+        """
+        Read output from the process in real-time, a batch at a time.
+
+        Yields:
+            Lists of the complete lines that arrived in each read, so callers
+            can handle fast output per batch rather than per line
+        """
         if not self.process:
             raise RuntimeError("Process not started. Call start() first.")
 
@@ -288,20 +306,27 @@ class CommandRunner:
         consecutive_errors = 0
         max_consecutive_errors = 5
 
+        # A local copy: terminate() on another thread may clear master_fd
+        # at any point, and a closed fd then fails with an OSError instead
+        fd = self.master_fd
         while True:
+            # terminate() from another thread has closed the pty
+            if self.master_fd is None:
+                break
+
             # Check if process has finished
             poll_result = self.process.poll()
 
             # Use select to check if data is available
             try:
-                ready, _, _ = select.select([self.master_fd], [], [], 0.1)
+                ready, _, _ = select.select([fd], [], [], 0.1)
             except (OSError, ValueError) as e:
                 self._log_error(f"select() error: {e}")
                 break
 
             if ready:
                 try:
-                    chunk = os.read(self.master_fd, 1024)
+                    chunk = os.read(fd, READ_CHUNK_SIZE)
                     if not chunk:
                         logger.info("Received EOF from process")
                         break
@@ -310,10 +335,10 @@ class CommandRunner:
                     consecutive_errors = 0
                     buffer += chunk
 
-                    # Process complete lines
-                    while b'\n' in buffer:
-                        line, buffer = buffer.split(b'\n', 1)
-                        yield line.decode('utf-8', errors='replace')
+                    # Process complete lines, with one split per read
+                    *lines, buffer = buffer.split(b'\n')
+                    if lines:
+                        yield [line.decode('utf-8', errors='replace') for line in lines]
 
                 except OSError as e:
                     # Handle interrupted system call - this is recoverable
@@ -342,16 +367,16 @@ class CommandRunner:
                 try:
                     remaining_attempts = 10
                     while remaining_attempts > 0:
-                        ready, _, _ = select.select([self.master_fd], [], [], 0)
+                        ready, _, _ = select.select([fd], [], [], 0)
                         if not ready:
                             break
-                        chunk = os.read(self.master_fd, 1024)
+                        chunk = os.read(fd, READ_CHUNK_SIZE)
                         if not chunk:
                             break
                         buffer += chunk
-                        while b'\n' in buffer:
-                            line, buffer = buffer.split(b'\n', 1)
-                            yield line.decode('utf-8', errors='replace')
+                        *lines, buffer = buffer.split(b'\n')
+                        if lines:
+                            yield [line.decode('utf-8', errors='replace') for line in lines]
                         remaining_attempts -= 1
                         
                 except OSError as e:
@@ -362,7 +387,7 @@ class CommandRunner:
                 if buffer:
                     final_line = buffer.decode('utf-8', errors='replace')
                     logger.debug(f"Yielding partial final line: {final_line[:100]}")
-                    yield final_line
+                    yield [final_line]
                 break
 
     def read_output_filtered(self):
@@ -377,6 +402,17 @@ class CommandRunner:
             category, categorized_line = self.output_filter.add_line(line)
             yield category, categorized_line
 
+    def read_output_filtered_batches(self):
+        """
+        Read output and yield categorized lines, a batch at a time.
+        
+        Yields:
+            Lists of (category, line) tuples, one list per read
+        """
+        add_line = self.output_filter.add_line
+        for lines in self.read_output_batches():
+            yield [add_line(line) for line in lines]
+
     def run_interactive(self, help_keys: Optional[Dict[str, str]] = None):
         """
         Run the process with interactive display control.
@@ -491,6 +527,10 @@ class CommandRunner:
         return {cat: self.output_filter.get_buffer(cat) 
                 for cat in self.output_filter.buffers.keys()}
 
+    def get_buffer(self, category: str) -> List[str]:
+        """Get the buffered output for one category, without copying the rest."""
+        return self.output_filter.get_buffer(category)
+
     def get_latest_by_category(self) -> Dict[str, Optional[str]]:
         """
         Get the latest line for each category.
@@ -523,7 +563,8 @@ class CommandRunner:
 
     def terminate(self):
         """Terminate the process gracefully."""
-        if self.process:
+        # A process that has already exited needs no signal
+        if self.process and self.process.poll() is None:
             logger.info(f"Terminating process {self.process.pid}")
             self.process.terminate()
             try:
@@ -534,13 +575,25 @@ class CommandRunner:
                 self.process.kill()
                 logger.info(f"Process {self.process.pid} killed")
 
-        if self.master_fd:
+        # Taken and cleared in one step, so two terminate() calls cannot
+        # both close it, by which time the number may belong to another file
+        fd, self.master_fd = self.master_fd, None
+        if fd:
             try:
-                os.close(self.master_fd)
+                os.close(fd)
                 logger.debug("Closed master file descriptor")
             except OSError as e:
                 logger.warning(f"Error closing master fd: {e}")
 
+    def wait(self, timeout: Optional[float] = None):
+        """
+        Block until the process exits, without polling.
+
+        Returns:
+            The return code, or None if there is no process
+        """
+        return self.process.wait(timeout=timeout) if self.process else None
+
     def is_running(self):
         """Check if the process is still running."""
         return self.process and self.process.poll() is None
@@ -637,10 +690,7 @@ Examples:
             runner.run_simple(display_mode=args.mode)
         
         # Wait for completion
-        while runner.is_running():
-            time.sleep(0.1)
-        
-        return_code = runner.get_return_code()
+        return_code = runner.wait()
         print(f"\nProcess exited with code: {return_code}")
         
         # Show buffer stats
@@ -29,10 +29,9 @@ def run_computation(job: "Job", config: Dict[str, Any] = None):
 
         # Simulate computation
         for i in range(min(100,n_proteins)):
-            while job.get_state()['status'] == 'paused':
-                time.sleep(1)
+            job.resume_event.wait()  # Blocks only while paused
             # Check if cancelled
-            if job.get_state()["status"] == "cancelling":
+            if job.cancel_event.is_set():
                 job.update(
                     status="cancelled",
                     current_step="Computation cancelled"
@@ -56,7 +55,7 @@ def run_computation(job: "Job", config: Dict[str, Any] = None):
                 current_step=f"Processing batch {i+1}/100"
             )
 
-            time.sleep(0.1)  # Simulate work
+            job.cancel_event.wait(0.1)  # Simulate work, cut short by a cancel
 
         job.update(
             status="completed",
@@ -65,10 +64,10 @@ def run_computation(job: "Job", config: Dict[str, Any] = None):
 
     except Exception as e:
         logger.error(f"Error in computation: {e}")
-        job.update(
+        job.add_error(
+            str(e),
             status="error",
-            current_step=f"Error: {str(e)}",
-            errors=job.get_state()["errors"] + [str(e)]
+            current_step=f"Error: {str(e)}"
         )
 
 if __name__ == "__main__":
@@ -15,6 +15,9 @@ DATA_DIR = Path(os.getenv('SEQQUESTS_DATA_DIR', '~/data/seqquests')).expanduser(
 # Ensure it exists
 DATA_DIR.mkdir(parents=True, exist_ok=True)
 
+# Development: send no-cache headers on every response (SEQQUESTS_NO_CACHE=1)
+NO_CACHE = os.getenv('SEQQUESTS_NO_CACHE') == '1'
+
 # Specific data paths
 FASTA_PATH = DATA_DIR / 'swissprot_trembl.fasta'
 NCBI_TAXONOMY_DB = DATA_DIR / 'ncbi_taxonomy.db'
@@ -1,4 +1,5 @@
 import argparse
+import time
 from sequences import read_swissprot_sequences
 
 """
@@ -24,6 +25,9 @@ ORGANISM_MAP = {
     'mouse': 'Mus musculus',
 }
 
+# Least time between progress updates sent to the job
+UPDATE_INTERVAL_SECONDS = 0.05
+
 def filter_proteins(records, organisms=None, require_go=False, require_ec=False, require_pfam=False, no_fragments=True, no_uncharacterized=True, require_any_feature=True):
     """
     Filters an iterator of protein records based on specified criteria.
@@ -80,7 +84,10 @@ def run_data_munging(organisms=None, require_go=False, require_ec=False, require
     This function can be called from other modules.
     The 'job' parameter is optional and is used for progress tracking.
     """
-    all_records = read_swissprot_sequences()
+    # The organism filter is pushed down into the reader, which skips
+    # records from other organisms without parsing them
+    scientific_names = [ORGANISM_MAP[org] for org in organisms] if organisms else None
+    all_records = read_swissprot_sequences(organisms=scientific_names)
 
     # Correctly call the generator and convert to a list for processing
     filtered_iterator = filter_proteins(
@@ -93,7 +100,18 @@ def run_data_munging(organisms=None, require_go=False, require_ec=False, require
 
     sequences_examined = 0
     proteins_processed = 0
+    most_recent_item = ""
     last_ten_accepted = []
+    last_report = 0.0
+
+    def report_progress():
+        job.update(
+            sequences_examined=sequences_examined,
+            proteins_processed=proteins_processed,
+            most_recent_item=most_recent_item,
+            last_ten_accepted=list(last_ten_accepted),
+            progress=f"Found: {proteins_processed} in: {sequences_examined}"
+        )
 
     # Iterate through the filtered results
     for record in filtered_iterator:
@@ -112,18 +130,20 @@ def run_data_munging(organisms=None, require_go=False, require_ec=False, require
 
 
         if job:
-            job.update(
-                sequences_examined=sequences_examined,
-                proteins_processed=proteins_processed,
-                most_recent_item=most_recent_item,
-                last_ten_accepted=last_ten_accepted,
-                progress=f"Found: {proteins_processed} in: {sequences_examined}"
-            )
+            # Records can be accepted thousands of times a second; the UI
+            # only needs a few updates a second.
+            now = time.monotonic()
+            if now - last_report >= UPDATE_INTERVAL_SECONDS:
+                last_report = now
+                report_progress()
         else:
             # Print to console if not a job
             print(most_recent_item)
 
-    if not job:
+    if job:
+        # The throttle may have skipped the last few records
+        report_progress()
+    else:
         print(f"Found {proteins_processed} records matching the criteria.")
 
 def test_munger_filtering_mouse():
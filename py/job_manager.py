@@ -1,7 +1,8 @@
+import asyncio
+import orjson
 import threading
 import time
 import uuid
-from datetime import datetime
 from typing import Dict, Any, Optional, Type
 import logging
 import argparse
@@ -23,6 +24,24 @@ Each job can start, pause, resume and provide status information
 
 logger = logging.getLogger(__name__)
 
+# Longest an update waits before it is pushed to /events clients
+EVENT_FLUSH_SECONDS = 0.1
+
+# Errors kept per job; older ones are dropped
+MAX_JOB_ERRORS = 64
+
+# Statuses a job does not leave; completed_at is set on reaching one
+FINISHED_STATUSES = ("completed", "failed", "error", "cancelled")
+
+# SwSearchJob output lines are batched into one update per this many lines,
+# or per this many seconds, whichever comes first
+TRACKING_FLUSH_LINES = 64
+TRACKING_FLUSH_SECONDS = 0.1
+
+def _append_error(errors, message):
+    """A new error list: `errors` plus `message`, capped at MAX_JOB_ERRORS."""
+    return errors[-(MAX_JOB_ERRORS - 1):] + [message]
+
 class Job:
     def __init__(self, job_id: str, job_type: str, manager: 'JobManager'):
         self.job_id = job_id
@@ -38,28 +57,134 @@ class Job:
             "elapsed_time": 0,
             "progress": "No Progress Info",
             "errors": [],
-            "last_update": datetime.utcnow().isoformat()
+            "last_update": time.time(),
+            "completed_at": None
         }
         self.lock = threading.Lock()
         self.thread = None
+        # Set by delete(); job code can wait on it instead of sleeping
+        self.cancel_event = threading.Event()
+        # Cleared while paused, so job code can wait on it instead of polling
+        self.resume_event = threading.Event()
+        self.resume_event.set()
+        # Shared by all live /events clients, on self.loop: each flush puts
+        # the fields changed since the previous flush in self.payload, then
+        # sets and replaces self.changed to wake every client at once.
+        self.listeners = 0
+        self.loop = None
+        self.flush_pending = False
+        self.payload = b""
+        self.flushed_state = {}
+        self.flushes = 0
+        self.changed = None
+        # Bumped on every update; the status endpoint's ETag
+        self.version = 0
 
     def update(self, **kwargs):
+        # Copy-on-write: a new dict is built and swapped in, so a state dict
+        # once published is never changed and readers need neither the lock
+        # nor a copy. The lock only keeps concurrent writers from losing
+        # each other's changes.
         with self.lock:
-            self.state.update(kwargs)
-            self.state["last_update"] = datetime.utcnow().isoformat()
-
-            if self.state["start_time"]:
-                self.state["elapsed_time"] = time.time() - self.state["start_time"]
+            state = {**self.state, **kwargs}
+            state["last_update"] = time.time()
+            if state["status"] in FINISHED_STATUSES and not state["completed_at"]:
+                state["completed_at"] = state["last_update"]
+            status_changed = state["status"] != self.state["status"]
+            self.state = state
+            self.version += 1
+
+            if self.listeners and (status_changed or not self.flush_pending):
+                self.schedule_flush(immediate=status_changed)
+
+    def schedule_flush(self, immediate=False):
+        # Called with the lock held. Updates that arrive before the flush
+        # runs are coalesced into it, so a job thread calling update() in a
+        # tight loop costs the event loop at most one flush per interval.
+        # Status changes (start, pause, finish) are flushed straight away.
+        self.flush_pending = True
+        try:
+            if immediate:
+                self.loop.call_soon_threadsafe(self.flush)
+            else:
+                self.loop.call_soon_threadsafe(self.loop.call_later, EVENT_FLUSH_SECONDS, self.flush)
+        except RuntimeError:
+            pass  # loop already closed, the clients are gone
+
+    def flush(self):
+        """Publish state changes to the /events clients. Runs on their event loop."""
+        with self.lock:
+            self.flush_pending = False
+        state = self.snapshot()
+        changes = {key: value for key, value in state.items()
+                   if key not in self.flushed_state or self.flushed_state[key] != value}
+        if not changes:
+            # e.g. a delayed flush overtaken by an immediate one for a
+            # status change; no need to wake the clients
+            return
+        self.flushed_state = state
+        # Encoded once here rather than once per client
+        self.payload = orjson.dumps(changes)
+        self.flushes += 1
+        changed, self.changed = self.changed, asyncio.Event()
+        changed.set()
+
+    def subscribe(self, loop):
+        """Register an /events client, whose stream waits with wait_flush()."""
+        with self.lock:
+            self.loop = loop
+            if not self.listeners:
+                # Nothing was flushed while no one listened, so the last
+                # flushed state is stale. Restart the change lists from now.
+                self.flushed_state = self.snapshot()
+            self.listeners += 1
+            if self.changed is None:
+                self.changed = asyncio.Event()
+
+    def unsubscribe(self):
+        with self.lock:
+            self.listeners -= 1
+
+    async def wait_flush(self, seen: int):
+        """
+        Wait for a flush after number `seen`. Event loop only. Afterwards,
+        self.flushes is the latest flush number, self.payload holds only the
+        changes made in that flush, and self.flushed_state is the full state
+        that the changes lead to.
+        """
+        if self.flushes == seen:
+            await self.changed.wait()
 
     def get_state(self):
-        with self.lock:
-            return self.state.copy()
+        """The current state. Shared, so callers must not modify it."""
+        return self.state
+
+    def snapshot(self):
+        """
+        The state as sent to clients. elapsed_time is worked out here, once
+        per read, rather than on every update.
+        """
+        state = self.state
+        if state["start_time"]:
+            return {**state, "elapsed_time": state["last_update"] - state["start_time"]}
+        return state
+
+    def add_error(self, message: str, **kwargs):
+        """Record an error (plus any other updates), keeping the latest MAX_JOB_ERRORS."""
+        self.update(errors=_append_error(self.state["errors"], message), **kwargs)
 
     def start(self):
         if self.state['status'] not in ['paused', 'created']:
             logger.warning(f"Job {self.job_id} cannot be started from state {self.state['status']}")
             return
 
+        if self.thread is not None:
+            # Started before and then paused: carry on with the same run,
+            # which is blocked on resume_event
+            self.resume()
+            return
+
+        self.resume_event.set()
         self.update(status="running", start_time=time.time())
         self.thread = threading.Thread(target=self.run, daemon=True)
         self.thread.start()
@@ -70,6 +195,7 @@ class Job:
             logger.warning(f"Job {self.job_id} cannot be paused from state {self.state['status']}")
             return
 
+        self.resume_event.clear()
         self.update(status="paused")
         logger.info(f"Job {self.job_id} paused.")
 
@@ -79,16 +205,19 @@ class Job:
             return
 
         self.update(status="running")
+        self.resume_event.set()
         logger.info(f"Job {self.job_id} resumed.")
 
     def delete(self):
+        self.cancel_event.set()
+        # Wake a paused job so that it sees the cancel
+        self.resume_event.set()
         self.update(status="cancelled")
         logger.info(f"Job {self.job_id} cancelled.")
         self.manager.delete_job(self.job_id)
 
     def configure(self, config: Dict[str, Any]):
-        with self.lock:
-            self.state['config'].update(config)
+        self.update(config={**self.state['config'], **config})
         logger.info(f"Job {self.job_id} configured.")
 
     def run(self):
@@ -100,6 +229,9 @@ class Job:
 class MockJob:
     def __init__(self):
         self.state = {"status": "running", "errors": []}
+        self.cancel_event = threading.Event()
+        self.resume_event = threading.Event()
+        self.resume_event.set()
     
     def update(self, **kwargs):
         self.state.update(kwargs)
@@ -112,6 +244,9 @@ class MockJob:
     def get_state(self):
         return self.state
 
+    def add_error(self, message: str, **kwargs):
+        self.update(errors=_append_error(self.state["errors"], message), **kwargs)
+
 class ComputationJob(Job):
     def __init__(self, job_id: str, manager: 'JobManager'):
         super().__init__(job_id, "computation", manager)
@@ -134,7 +269,7 @@ class ComputationJob(Job):
                 self.update(status="completed")
         except Exception as e:
             logger.error(f"Job {self.job_id} failed: {e}")
-            self.update(status="failed", errors=[str(e)])
+            self.add_error(str(e), status="failed")
 
 
 class DataMungingJob(Job):
@@ -162,7 +297,7 @@ class DataMungingJob(Job):
                 self.update(status="completed")
         except Exception as e:
             logger.error(f"Job {self.job_id} failed: {e}")
-            self.update(status="failed", errors=[str(e)])
+            self.add_error(str(e), status="failed")
         logger.info(f"Data munging job {self.job_id} finished.")
 
 
@@ -181,33 +316,60 @@ class SwSearchJob(Job):
             "latest_stats": None,
             "latest_hit": None,
         })
+        # Batched by tracking(), see flush_tracking()
+        self.pending = {}
+        self.pending_lines = 0
+        self.last_flush = 0.0
+        self.bench_changed = False
     
     def run(self):
         sw_runner = SWRunner(  );
         sw_runner.run(self.state['config'], self)
 
-    def tracking( self, runner, category, line ):
-        if category == 'stats':
-            self.update(progress=line)
-            
-        # Store hits
-        if category == 'hits':
-            self.update(latest_hit=line)
+    def tracking( self, runner, batch ):
+        # Called once per batch of (category, line) output. The changes are
+        # batched further and sent to update() every TRACKING_FLUSH_LINES
+        # lines or TRACKING_FLUSH_SECONDS, rather than copying the whole
+        # state on every line.
+        for category, line in batch:
+            if category == 'stats':
+                self.pending['progress'] = line
+            # Store hits
+            elif category == 'hits':
+                self.pending['latest_hit'] = line
+            elif category == 'bench':
+                self.bench_changed = True
+
+        self.pending_lines += len(batch)
+        if (self.pending_lines >= TRACKING_FLUSH_LINES or
+                time.monotonic() - self.last_flush >= TRACKING_FLUSH_SECONDS):
+            self.flush_tracking(runner)
       
-        # Handle pause/resume
-        if self.state['status'] == 'paused':
+        # Handle pause/resume. The event is checked rather than
+        # self.state['status'], as this runs on every output line.
+        if not self.resume_event.is_set():
+            self.flush_tracking(runner)
             runner.pause()
-            while self.state['status'] == 'paused':
-                time.sleep(0.5)
+            self.resume_event.wait()
             runner.resume()
             
-        if self.state['status'] == 'cancelled':
+        if self.cancel_event.is_set():
             runner.terminate()
             return False
 
-        buffers = runner.get_buffers()
-        self.state['output_log'] = buffers.get('bench', [])
         return True
+
+    def flush_tracking( self, runner ):
+        """Send the changes batched up by tracking() to update()."""
+        if self.bench_changed:
+            # The runner's bench deque is only copied when it has new lines
+            self.pending['output_log'] = runner.get_buffer('bench')
+            self.bench_changed = False
+        if self.pending:
+            self.update(**self.pending)
+        self.pending = {}
+        self.pending_lines = 0
+        self.last_flush = time.monotonic()
         
 
 
@@ -278,21 +440,30 @@ class JobManager:
                 del self.jobs[job_id]
                 logger.info(f"Deleted job {job_id}")
 
+    def evict_finished(self, max_age: float):
+        """Delete jobs that finished more than max_age seconds ago."""
+        cutoff = time.time() - max_age
+        for job_id, job in list(self.jobs.items()):
+            completed_at = job.get_state()["completed_at"]
+            if completed_at and completed_at < cutoff:
+                self.delete_job(job_id)
+
+    # Readers take no lock: dict.get and list(dict.items()) are atomic under
+    # the GIL, and only create_job/delete_job change the dict.
     def get_job(self, job_id: str) -> Optional[Job]:
-        with self.lock:
-            return self.jobs.get(job_id)
+        return self.jobs.get(job_id)
 
     def list_jobs(self) -> Dict[str, Any]:
-        with self.lock:
-            return {
-                job_id: {
-                    "status": job.state["status"],
-                    "job_type": job.job_type,
-                    "created_at": job.state["last_update"],
-                    "progress": job.state["progress"]
-                }
-                for job_id, job in self.jobs.items()
+        return {
+            job_id: {
+                "status": state["status"],
+                "job_type": job.job_type,
+                "created_at": state["last_update"],
+                "progress": state["progress"]
             }
+            for job_id, job in list(self.jobs.items())
+            for state in (job.get_state(),)
+        }
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Job Manager module")
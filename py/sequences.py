@@ -1,4 +1,5 @@
 import os
+import mmap
 from Bio import SwissProt, SeqIO
 from io import StringIO
 import re
@@ -7,7 +8,9 @@ import argparse
 import pickle
 from pathlib import Path
 import time
+import itertools
 from collections import OrderedDict
+from functools import lru_cache
 from types import SimpleNamespace
 import threading
 
@@ -33,12 +36,14 @@ class SequenceCache:
         self.sequences = OrderedDict()  # Maps seq_id -> record object
         self.seq_list = []  # For fast index-based access: [record, record, ...]
         self.load_time = 0
+        self._id_part_index = None  # Built on first use by get_record_by_id_part
 
     def load_sequences(self, data_file, file_format):
         """Load entire sequence file into memory"""
         start = time.time()
         self.sequences = OrderedDict()
         self.seq_list = []
+        self._id_part_index = None
 
         # Use the correct parser based on file format
         with open(data_file, 'r') as handle:
@@ -77,6 +82,19 @@ class SequenceCache:
         """Get record object by ID"""
         return self.sequences.get(seq_id)
 
+    def get_record_by_id_part(self, id_part):
+        """
+        Get the first record having id_part as one of the '|' separated
+        fields of its id, e.g. the accession or entry name of 'sp|P12345|NAME'.
+        """
+        if self._id_part_index is None:
+            index = {}
+            for record in self.seq_list:
+                for part in record.id.split('|'):
+                    index.setdefault(part, record)
+            self._id_part_index = index
+        return self._id_part_index.get(id_part)
+
     def get_sequence_by_index(self, index):
         """Get sequence by index (0-based, returns bytes)"""
         if 0 <= index < len(self.seq_list):
@@ -138,6 +156,7 @@ class SequenceCache:
 class PickledSequenceCache(SequenceCache):
     def __init__(self, data_file, cache_dir=".cache"):
         super().__init__()  # Call parent __init__
+        self.organisms = None  # Per seq_list entry, if the format indexes them
         self.data_file = Path(data_file)
         self.cache_dir = Path(cache_dir)
         self.cache_dir.mkdir(exist_ok=True)
@@ -158,6 +177,7 @@ class PickledSequenceCache(SequenceCache):
                 data = pickle.load(f)
                 self.sequences = data['sequences']
                 self.seq_list = data['seq_list']
+                self.organisms = data.get('organisms')
             self.load_time = time.time() - start
             print(f"Loaded {len(self.sequences)} sequences from cache in {self.load_time:.2f}s")
         else:
@@ -166,7 +186,8 @@ class PickledSequenceCache(SequenceCache):
             with open(self.cache_file, 'wb') as f:
                 pickle.dump({
                     'sequences': self.sequences,
-                    'seq_list': self.seq_list
+                    'seq_list': self.seq_list,
+                    'organisms': self.organisms
                 }, f, protocol=pickle.HIGHEST_PROTOCOL)
             print(f"Cache saved to {self.cache_file}")
         return self
@@ -176,6 +197,7 @@ class SwissIndexCache(PickledSequenceCache):
     def __init__(self, data_file, cache_dir=".cache"):
         super().__init__(data_file, cache_dir)
         self.handle = None  # File handle for the data file
+        self.handle_lock = threading.Lock()  # seek+read on the shared handle must not interleave
 
     # An alternative init, intended to put the cache in a specific
     # place relative to the source file.
@@ -198,21 +220,26 @@ class SwissIndexCache(PickledSequenceCache):
         start_time = time.time()
         self.sequences = OrderedDict()
         self.seq_list = []
-
-        # Use binary mode to ensure tell() is accurate
-        with open(data_file, 'rb') as f:
-            record_starts = []
-            while True:
-                pos = f.tell()
-                line = f.readline()
-                if not line: break
-                if line.startswith(b'ID'):
-                    record_starts.append(pos)
+        # A column alongside seq_list, so organism filters need not read
+        # the records at all
+        self.organisms = []
+
+        # Memory-mapped, so the scan for record starts is done by bytes.find
+        # over the whole file rather than a Python readline per line
+        with open(data_file, 'rb') as f, \
+                mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            record_starts = [0] if data[:2] == b'ID' else []
+            pos = data.find(b'\nID')
+            while pos != -1:
+                record_starts.append(pos + 1)
+                pos = data.find(b'\nID', pos + 1)
 
             for i in range(len(record_starts)):
-                f.seek(record_starts[i])
+                start_pos = record_starts[i]
+                end_pos = record_starts[i+1] if i+1 < len(record_starts) else len(data)
+
                 # Read first few lines to get ID and AC
-                chunk = f.read(1024).decode('latin-1')
+                chunk = data[start_pos:min(start_pos + 1024, end_pos)].decode('latin-1')
                 lines = chunk.splitlines()
                 
                 # Extract ID (Entry Name)
@@ -227,12 +254,6 @@ class SwissIndexCache(PickledSequenceCache):
                         ac_id = line.split()[1].strip(';')
                         break
 
-                start_pos = record_starts[i]
-                end_pos = record_starts[i+1] if i+1 < len(record_starts) else None
-                if end_pos is None:
-                    f.seek(0, 2)
-                    end_pos = f.tell()
-
                 record_info = (seq_id, start_pos, end_pos)
                 
                 # Store by Entry Name
@@ -243,22 +264,32 @@ class SwissIndexCache(PickledSequenceCache):
                     
                 self.seq_list.append(record_info)
 
+                # OS lines run up to the OC (taxonomy) lines
+                os_pos = data.find(b'\nOS', start_pos, end_pos)
+                os_end = data.find(b'\nOC', os_pos, end_pos) if os_pos != -1 else -1
+                os_lines = data[os_pos:os_end if os_end != -1 else end_pos] if os_pos != -1 else b''
+                self.organisms.append(_raw_organism(os_lines.decode('latin-1')))
+
         self.load_time = time.time() - start_time
         print(f"Indexed {len(self.seq_list)} sequences in {self.load_time:.2f}s")
         return self
 
+    def _read_raw(self, start_pos, end_pos):
+        """Read one raw record from the data file; safe to call from several threads"""
+        with self.handle_lock:
+            if self.handle is None:
+                self.handle = open(self.data_file, 'r')
+            self.handle.seek(start_pos)
+            return self.handle.read(end_pos - start_pos)
+
     def get_record(self, seq_id):
         """Get record object by ID using the index"""
-        if self.handle is None:
-            self.handle = open(self.data_file, 'r')
-
         record_info = self.sequences.get(seq_id)
         if not record_info:
             return None
 
         _, start_pos, end_pos = record_info
-        self.handle.seek(start_pos)
-        raw_record = self.handle.read(end_pos - start_pos)
+        raw_record = self._read_raw(start_pos, end_pos)
 
         # Use StringIO to parse the raw string data
         record = SwissProt.read(StringIO(raw_record))
@@ -267,13 +298,9 @@ class SwissIndexCache(PickledSequenceCache):
 
     def get_record_by_index(self, index):
         """Get record object by index using the index"""
-        if self.handle is None:
-            self.handle = open(self.data_file, 'r')
-
         if 0 <= index < len(self.seq_list):
             _, start_pos, end_pos = self.seq_list[index]
-            self.handle.seek(start_pos)
-            raw_record = self.handle.read(end_pos - start_pos)
+            raw_record = self._read_raw(start_pos, end_pos)
 
             # Use StringIO to parse the raw string data
             record = SwissProt.read(StringIO(raw_record))
@@ -288,11 +315,49 @@ class SwissIndexCache(PickledSequenceCache):
             record.item_no = i
             yield record
 
+    def iter_organisms(self, organisms):
+        """
+        Like iterating, but yield only records whose organism contains one of
+        `organisms` (case-insensitive). The test is made on the raw OS lines,
+        so the records that fail it are never parsed.
+        """
+        organisms = [name.lower() for name in organisms]
+        for i, (_, start_pos, end_pos) in enumerate(self.seq_list):
+            if self.organisms:
+                # Indexed: records that fail are not even read
+                os_text = self.organisms[i].lower()
+                if not any(name in os_text for name in organisms):
+                    continue
+                raw_record = self._read_raw(start_pos, end_pos)
+            else:
+                # A cache from before the organism column was added
+                raw_record = self._read_raw(start_pos, end_pos)
+                os_text = _raw_organism(raw_record).lower()
+                if not any(name in os_text for name in organisms):
+                    continue
+            record = SwissProt.read(StringIO(raw_record))
+            record.raw = raw_record
+            record.item_no = i
+            yield record
+
     def __del__(self):
         if self.handle:
             self.handle.close()
 
 
+def _raw_organism(raw_record):
+    """The organism of a raw SwissProt record: its OS lines, joined as the parser does."""
+    os_lines = []
+    pos = raw_record.find("\nOS   ")
+    while pos != -1:
+        end = raw_record.find("\n", pos + 1)
+        if end == -1:
+            end = len(raw_record)
+        os_lines.append(raw_record[pos + 6:end].rstrip())
+        pos = end if raw_record.startswith("OS   ", end + 1) else -1
+    return " ".join(os_lines)
+
+
 def get_data_path(original_filename):
     """
     Checks for data files in a user-specified path first, falling back
@@ -337,20 +402,28 @@ class DataManager:
         """Reset caches - useful for testing"""
         self._fasta_cache = None
         self._swissprot_cache = None
+        first_fasta_sequences.cache_clear()
+        get_protein.cache_clear()
 
+    # Double-checked, as in __new__: requests on several threads may ask
+    # at once, and only one of them should build (and pickle) a cache.
     def get_fasta_cache(self):
         if self._fasta_cache is None:
-            filepath = get_data_path('swissprot.fasta.txt')
-            self._fasta_cache = PickledSequenceCache(filepath).load_with_cache('fasta')
+            with self._lock:
+                if self._fasta_cache is None:
+                    filepath = get_data_path('swissprot.fasta.txt')
+                    self._fasta_cache = PickledSequenceCache(filepath).load_with_cache('fasta')
         return self._fasta_cache
 
     def get_swissprot_cache(self, file_format='swiss_index'):
         if self._swissprot_cache is None:
-            filepath = get_data_path('swissprot.dat.txt')
-            if file_format == 'swiss_index':
-                self._swissprot_cache = SwissIndexCache(filepath).load_with_cache(file_format)
-            else:
-                self._swissprot_cache = PickledSequenceCache(filepath).load_with_cache(file_format)
+            with self._lock:
+                if self._swissprot_cache is None:
+                    filepath = get_data_path('swissprot.dat.txt')
+                    if file_format == 'swiss_index':
+                        self._swissprot_cache = SwissIndexCache(filepath).load_with_cache(file_format)
+                    else:
+                        self._swissprot_cache = PickledSequenceCache(filepath).load_with_cache(file_format)
         return self._swissprot_cache
 
 
@@ -377,12 +450,32 @@ def read_fasta_sequences():
     """
     return DataManager().get_fasta_cache().iter_records()
 
-def read_swissprot_sequences(file_format='swiss_index'):
+@lru_cache(maxsize=None)
+def first_fasta_sequences(count=20):
+    """
+    The first `count` FASTA records as (description, sequence) tuples.
+    Cached, since the data does not change while the process runs.
+    """
+    return tuple(
+        (record.description, str(record.seq))
+        for record in itertools.islice(read_fasta_sequences(), count)
+    )
+
+def read_swissprot_sequences(file_format='swiss_index', organisms=None):
     """
     Cached version - loads once, then yields from cache.
     Returns tuples of (seq_id, sequence_string) instead of SeqIO.Record objects.
+    With `organisms` (scientific names, e.g. ['Mus musculus']), returns an
+    iterator over just the records from those organisms.
     """
-    return DataManager().get_swissprot_cache(file_format)
+    cache = DataManager().get_swissprot_cache(file_format)
+    if not organisms:
+        return cache
+    if isinstance(cache, SwissIndexCache):
+        return cache.iter_organisms(organisms)
+    names = [name.lower() for name in organisms]
+    return (record for record in cache
+            if any(name in record.organism.lower() for name in names))
 
 def get_sequence_by_identifier(identifier, db_name='swissprot'):
     """
@@ -403,7 +496,24 @@ def get_sequence_by_identifier(identifier, db_name='swissprot'):
                 return record
     return None
 
+def get_fasta_record(identifier):
+    """
+    Retrieves a FASTA record by accession, entry name or full id.
+    Exact matches come from an index; anything else falls back to the
+    sequential substring search of get_sequence_by_identifier.
+    """
+    record = DataManager().get_fasta_cache().get_record_by_id_part(identifier)
+    if record is None:
+        record = get_sequence_by_identifier(identifier, db_name='fasta')
+    return record
+
+@lru_cache(maxsize=4096)
 def get_protein( identifier ):
+    """
+    Parsed SwissProt entry for an accession or entry name.
+    Memoized, as the same proteins are asked for again and again by the
+    comparison view and tree browsing; treat the result as read-only.
+    """
     cache = DataManager().get_swissprot_cache(file_format='swiss_index')
     record = cache.get_record( identifier )
 
@@ -3,6 +3,7 @@ import numpy as np
 import argparse
 import ctypes
 import os
+from functools import lru_cache
 import sys
 from pathlib import Path
 
@@ -47,13 +48,19 @@ def get_matrix_32(weights="PAM250"):
     """
     Convert a Biopython substitution matrix (or name) to a flattened 32x32 float array.
     Uses index = char & 31.
+    Named matrices are built once and shared, so the result is read-only.
     """
-    # Load substitution matrix if string
     if isinstance(weights, str):
-        sub_matrix = substitution_matrices.load(weights)
-    else:
-        sub_matrix = weights
-        
+        return _named_matrix_32(weights)
+    return _build_matrix_32(weights)
+
+@lru_cache(maxsize=None)
+def _named_matrix_32(name):
+    matrix_32 = _build_matrix_32(substitution_matrices.load(name))
+    matrix_32.flags.writeable = False
+    return matrix_32
+
+def _build_matrix_32(sub_matrix):
     # Create 32x32 array (1024 floats)
     matrix_32 = np.zeros(1024, dtype=np.float32)
     
@@ -95,8 +102,7 @@ def align_local_swissprot_c(seq_a_str, seq_b_str, weights="PAM250", gap_extend=-
     len_a = len(seq_a_str)
     len_b = len(seq_b_str)
     
-    # Prepare matrix
-    # Note: Optimization - we could cache this if weights is a string
+    # Prepare matrix (cached when weights is a name)
     matrix_32 = get_matrix_32(weights)
     matrix_ptr = matrix_32.ctypes.data_as(ctypes.POINTER(ctypes.c_float))
     
@@ -186,6 +192,7 @@ def align_local_swissprot_c(seq_a_str, seq_b_str, weights="PAM250", gap_extend=-
         "seq_a_indices": indices_a,
         "seq_b_indices": indices_b,
         "aligned_a": aligned_a_str,
+        "match_line": match_line,
         "aligned_b": aligned_b_str,
         "range_summary": {
             "seq_a_start": indices_a[0] if indices_a else 0,
@@ -322,6 +329,7 @@ def align_local_swissprot_python(seq_a_str, seq_b_str, weights="PAM250", gap_ope
         "seq_a_indices": indices_a,
         "seq_b_indices": indices_b,
         "aligned_a": aligned_a,
+        "match_line": match_line,
         "aligned_b": aligned_b,
         "range_summary": {
             "seq_a_start": indices_a[0] if indices_a else 0,
@@ -178,23 +178,30 @@ class SWRunner:
             
             runner.start()
             
-            for category, line in runner.read_output_filtered():
+            for batch in runner.read_output_filtered_batches():
+                # Results are buffered before tracking, so that a cancel
+                # does not lose the batch it arrives in
+                for category, line in batch:
+                    if not job and category != 'hits':
+                        print(f":::{line}")
+                    # Parse and buffer HIT lines
+
+                    csv_line = self._parse_result_line(line)
+                    if csv_line:
+                        self.result_buffer.append(csv_line)
+                        #result_count += 1
+
+                # Check if it's time to flush (time-based)
+                self._flush_buffer(force=False)
+
                 if job:
-                    more = job.tracking( runner, category, line )
+                    more = job.tracking( runner, batch )
                     if not more :
                         break
-                elif category != 'hits':
-                    print(f":::{line}")
-                    # Parse and buffer HIT lines
-
-                csv_line = self._parse_result_line(line)
-                if csv_line:
-                    self.result_buffer.append(csv_line)
-                    #result_count += 1
-                    
-                    # Check if it's time to flush (time-based)
 
-                    self._flush_buffer(force=False)
+            if job:
+                # The last few lines may still be batched up in the job
+                job.flush_tracking(runner)
 
         try:   
             pass
@@ -1,19 +1,27 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import Depends, FastAPI, HTTPException, Request, Response
+from fastapi.concurrency import run_in_threadpool
 from fastapi.responses import FileResponse
+from fastapi.responses import ORJSONResponse
 from fastapi.responses import PlainTextResponse
 from fastapi.staticfiles import StaticFiles
-from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import StreamingResponse
+from starlette.datastructures import Headers, MutableHeaders
 from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.middleware.gzip import GZipMiddleware
 
 import asyncio
+from contextlib import asynccontextmanager
 from typing import Dict, Any
 import logging
 from pydantic import BaseModel
 import argparse
+import hashlib
 import json
+import orjson
+from functools import lru_cache
 
-from job_manager import JobManager, JOB_TYPES
+from job_manager import Job, JobManager, JOB_TYPES
+from config import NO_CACHE
 import sequences
 import sw_align
 import uniprot_mapper
@@ -44,18 +52,114 @@ class NoCacheMiddleware(BaseHTTPMiddleware):
         return response
 
 
-app = FastAPI()
+class StaticCacheMiddleware:
+    """
+    Lets browsers cache static assets for an hour.
+    Pages, app.js and the panels are sent no-cache instead: the browser
+    revalidates them on each load, so a new app.js is never paired with
+    panels it does not match, or the other way round.
+    API responses are left alone.
+    """
+    CACHED_PREFIXES = ("/static/", "/docs/")
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"].startswith("/api/"):
+            await self.app(scope, receive, send)
+            return
+
+        path = scope["path"]
+        if path.startswith(self.CACHED_PREFIXES) and path != "/docs/doclist.js":
+            cache_control = "public, max-age=3600"
+        else:
+            cache_control = "no-cache"
+
+        async def send_with_cache_control(message):
+            if message["type"] == "http.response.start":
+                MutableHeaders(scope=message).setdefault("Cache-Control", cache_control)
+            await send(message)
 
-# Add CORS middleware to allow all origins
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],
-    # allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
-# Remove when debugging is complete.
-app.add_middleware(NoCacheMiddleware)
+        await self.app(scope, receive, send_with_cache_control)
+
+
+class AllowAllCORSMiddleware:
+    """
+    CORS for allow-all origins, without per-request origin matching.
+    Ordinary requests just get a static Access-Control-Allow-Origin header.
+    OPTIONS preflights get a fixed answer.
+    Plain ASGI rather than BaseHTTPMiddleware, so polls pay almost nothing.
+    """
+    # Fixed lists of what the API actually uses, so preflights need no
+    # per-request work, and browsers may cache them for a day.
+    PREFLIGHT_HEADERS = {
+        "Access-Control-Allow-Origin": "*",
+        "Access-Control-Allow-Methods": "DELETE, GET, HEAD, OPTIONS, POST",
+        "Access-Control-Allow-Headers": "Content-Type, If-None-Match",
+        "Access-Control-Max-Age": "86400",
+    }
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        if scope["method"] == "OPTIONS":
+            if "access-control-request-method" in Headers(scope=scope):
+                await PlainTextResponse("OK", headers=self.PREFLIGHT_HEADERS)(scope, receive, send)
+                return
+
+        async def send_with_cors(message):
+            if message["type"] == "http.response.start":
+                MutableHeaders(scope=message)["Access-Control-Allow-Origin"] = "*"
+            await send(message)
+
+        await self.app(scope, receive, send_with_cors)
+
+
+class EventStreamGZipMiddleware(GZipMiddleware):
+    """
+    GZip for everything except Server-Sent Event streams.
+    The compressor buffers its output, which would hold events back.
+    """
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope["path"].endswith("/events"):
+            await self.app(scope, receive, send)
+            return
+        await super().__call__(scope, receive, send)
+
+
+# Finished jobs stay listed for an hour, then are dropped
+FINISHED_JOB_TTL_SECONDS = 3600
+
+async def evict_finished_jobs():
+    while True:
+        await asyncio.sleep(60)
+        job_manager.evict_finished(FINISHED_JOB_TTL_SECONDS)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    evictor = asyncio.create_task(evict_finished_jobs())
+    yield
+    evictor.cancel()
+
+# orjson encodes the long sequence/alignment strings far faster than stdlib json
+app = FastAPI(default_response_class=ORJSONResponse, lifespan=lifespan)
+
+# Compress larger responses (findings, CSV stream, protein JSON).
+# Added first so it sits inside the CORS and cache-header middleware.
+app.add_middleware(EventStreamGZipMiddleware, minimum_size=1024, compresslevel=5)
+# Allow all origins
+app.add_middleware(AllowAllCORSMiddleware)
+if NO_CACHE:
+    # While developing: always refetch, so edits show up on reload
+    app.add_middleware(NoCacheMiddleware)
+else:
+    app.add_middleware(StaticCacheMiddleware)
 
 FINDINGS_FILE = PROJECT_ROOT / "sw_results" / "sw_finds_standard.txt"  # Path to your main results file
 
@@ -74,7 +178,8 @@ class JobConfigRequest(BaseModel):
     config: Dict[str, Any]
 
 # Only allow safe filename characters
-SAFE_FILENAME_RE = re.compile(r'^[a-zA-Z0-9][a-zA-Z0-9._\-]*$')
+# Used with fullmatch: unlike match + '$', a trailing newline cannot slip through.
+SAFE_FILENAME_RE = re.compile(r'[a-zA-Z0-9][a-zA-Z0-9._\-]*', re.ASCII)
 
 def safe_filename(filename: str) -> str:
     """
@@ -82,21 +187,59 @@ def safe_filename(filename: str) -> str:
     Allowlist approach: alphanumeric, dots, dashes, underscores.
     Must start with alphanumeric (prevents dotfiles and hidden files).
     """
-    if not filename or not SAFE_FILENAME_RE.match(filename):
+    if not SAFE_FILENAME_RE.fullmatch(filename):
         raise HTTPException(status_code=400, detail="Invalid filename")
     return filename
 
+# directory -> (mtime_ns, names of the files in it)
+_dir_listings = {}
+
+def _files_in(directory: Path) -> frozenset:
+    """Names of the files in a directory, re-listed only when its mtime changes."""
+    try:
+        mtime = os.stat(directory).st_mtime_ns
+    except FileNotFoundError:
+        return frozenset()
+    cached = _dir_listings.get(directory)
+    if cached and cached[0] == mtime:
+        return cached[1]
+    with os.scandir(directory) as entries:
+        names = frozenset(entry.name for entry in entries if entry.is_file())
+    _dir_listings[directory] = (mtime, names)
+    return names
+
+def listed_file(directory: Path, filename: str) -> Path:
+    """
+    Path to a file served from directory.
+    Names not actually present in the directory are rejected with a 404
+    before anything is opened, so no path built from the request is touched.
+    """
+    filename = safe_filename(filename)
+    if filename not in _files_in(directory):
+        raise HTTPException(status_code=404, detail="File not found")
+    return directory / filename
+
+# async so FastAPI calls it on the event loop rather than via the threadpool
+async def require_job(job_id: str) -> Job:
+    """Dependency for the /api/job/{job_id} routes: the job, or a 404."""
+    job = job_manager.get_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
 # --- REST Endpoints ---
 """ The order in which these functions appear determines the order in 
 the API /docs, so take some care to group and order the items logically.
 """
 
 
+# JOB_TYPES is fixed at import, so the public summary of it is too.
+JOB_TYPE_SUMMARIES = [{"id": job["id"], "display_name": job["display_name"]} for job in JOB_TYPES]
+
 @app.get("/api/job_types")
 async def get_job_types():
     """Return a list of available job types."""
-
-    return [{"id": job["id"], "display_name": job["display_name"]} for job in JOB_TYPES]
+    return JOB_TYPE_SUMMARIES
 
 
 @app.get("/api/jobs")
@@ -105,12 +248,55 @@ async def list_jobs():
     return job_manager.list_jobs()
 
 @app.get("/api/job/{job_id}/status")
-async def get_job_status(job_id: str):
-    """Get status for a specific job."""
-    job = job_manager.get_job(job_id)
-    if not job:
-        raise HTTPException(status_code=404, detail="Job not found")
-    return job.get_state()
+async def get_job_status(request: Request, job: Job = Depends(require_job)):
+    """Get status for a specific job. Answers 304 if the client's copy is current."""
+    # Read before the state: a stale tag only costs the client a full response
+    etag = f'W/"{job.version}"'
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    return ORJSONResponse(job.snapshot(), headers=headers)
+
+# Comment lines keep idle streams from being timed out by proxies
+SSE_HEARTBEAT_SECONDS = 15
+
+@app.get("/api/job/{job_id}/events")
+async def job_events(job: Job = Depends(require_job)):
+    """Stream status for a specific job as Server-Sent Events, pushed as it changes."""
+    async def event_stream():
+        # Subscribed here, not in the endpoint, so unsubscribe always follows
+        job.subscribe(asyncio.get_running_loop())
+        logger.debug(f"Events client connected to job {job.job_id}")
+        try:
+            # Messages after the first carry only changed fields, which the
+            # page merges. Full states sent are the flushed ones, so that the
+            # next change list applies to exactly what the page holds.
+            seen = job.flushes
+            yield b"data: " + orjson.dumps(job.flushed_state) + b"\n\n"
+            while True:
+                try:
+                    await asyncio.wait_for(job.wait_flush(seen), SSE_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    if job_manager.get_job(job.job_id) is None:
+                        break
+                    yield b": ping\n\n"
+                    continue
+                if job.flushes == seen + 1:
+                    message = job.payload
+                else:
+                    # Missed a flush while sending, so send everything
+                    message = orjson.dumps(job.flushed_state)
+                seen = job.flushes
+                yield b"data: " + message + b"\n\n"
+        finally:
+            job.unsubscribe()
+            logger.debug(f"Events client disconnected from job {job.job_id}")
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
 @app.post("/api/job")
 async def create_job_endpoint(request: JobCreationRequest):
@@ -121,71 +307,57 @@ async def create_job_endpoint(request: JobCreationRequest):
     return {"job_id": job_id, "status": "created"}
 
 @app.post("/api/job/{job_id}/start")
-async def start_job(job_id: str):
+async def start_job(job: Job = Depends(require_job)):
     """Start a specific job."""
-    job = job_manager.get_job(job_id)
-    if not job:
-        raise HTTPException(status_code=404, detail="Job not found")
     job.start()
-    return {"job_id": job_id, "status": "starting"}
+    return {"job_id": job.job_id, "status": "starting"}
 
 @app.post("/api/job/{job_id}/pause")
-async def pause_job(job_id: str):
+async def pause_job(job: Job = Depends(require_job)):
     """Pause a specific job."""
-    job = job_manager.get_job(job_id)
-    if not job:
-        raise HTTPException(status_code=404, detail="Job not found")
     job.pause()
-    return {"job_id": job_id, "status": "pausing"}
+    return {"job_id": job.job_id, "status": "pausing"}
 
 @app.post("/api/job/{job_id}/resume")
-async def resume_job(job_id: str):
+async def resume_job(job: Job = Depends(require_job)):
     """Resume a specific job."""
-    job = job_manager.get_job(job_id)
-    if not job:
-        raise HTTPException(status_code=404, detail="Job not found")
     job.resume()
-    return {"job_id": job_id, "status": "resuming"}
+    return {"job_id": job.job_id, "status": "resuming"}
 
 @app.post("/api/job/{job_id}/configure")
-async def configure_job(job_id: str, request: JobConfigRequest):
+async def configure_job(request: JobConfigRequest, job: Job = Depends(require_job)):
     """Configure a specific job."""
-    job = job_manager.get_job(job_id)
-    if not job:
-        raise HTTPException(status_code=404, detail="Job not found")
     job.configure(request.config)
-    return {"job_id": job_id, "status": "configured"}
+    return {"job_id": job.job_id, "status": "configured"}
 
 @app.delete("/api/job/{job_id}")
-async def delete_job(job_id: str):
+async def delete_job(job: Job = Depends(require_job)):
     """Delete a specific job."""
-    job = job_manager.get_job(job_id)
-    if not job:
-        raise HTTPException(status_code=404, detail="Job not found")
     job.delete()
-    return {"job_id": job_id, "status": "deleting"}
+    return {"job_id": job.job_id, "status": "deleting"}
 
-@app.get("/api/findings", response_class=PlainTextResponse)
+@app.get("/api/findings", response_class=FileResponse)
 async def get_findings():
     """Return the findings file content"""
     if not FINDINGS_FILE.exists():
         raise HTTPException(status_code=404, detail="Findings file not found")
     
-    try:
-        return FINDINGS_FILE.read_text()
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error reading findings: {str(e)}")
+    # Streamed from disk rather than read into memory first
+    return FileResponse(FINDINGS_FILE, media_type="text/plain")
 
-async def stream_file(filepath: str, chunk_size: int = 8192):
-    """Stream file in chunks"""
-    with open(filepath, 'r') as f:
+async def stream_file(filepath: str, chunk_size: int = 65536):
+    """
+    Stream file in chunks, with the reads done off the event loop.
+    Unbuffered readinto() fills one reused buffer, so each chunk is copied
+    once, into the bytes handed to the response.
+    """
+    view = memoryview(bytearray(chunk_size))
+    with open(filepath, 'rb', buffering=0) as f:
         while True:
-            chunk = f.read(chunk_size)
-            if not chunk:
+            n = await run_in_threadpool(f.readinto, view)
+            if not n:
                 break
-            yield chunk
-            # Optional: allow other tasks to run
-            await asyncio.sleep(0)
+            yield bytes(view[:n])
 
 # Provides an API to the links data as a stream of data  
 @app.get("/stream-data")
@@ -196,36 +368,35 @@ async def stream_link_data():
         media_type="text/plain"
     )
 
-@app.get("/api/comparison/{id1}/{id2}")
-async def get_sequence_alignment(id1: str, id2: str):
+# Alignments are deterministic, and the UI revisits the same pairs often.
+# Keyed on the ordered pair: swapping sequences can change the traceback.
+@lru_cache(maxsize=4096)
+def _compare_proteins(id1: str, id2: str) -> dict:
     s1 = sequences.get_protein( id1 )
     s2 = sequences.get_protein( id2 )
     alignment = sw_align.align_local_swissprot( s1.full.sequence, s2.full.sequence)
 
-    parts = alignment['visual_text'].split('\n')
     return {
         "sequence1": s1.full.raw,
         "sequence2": s2.full.raw,
         "score": alignment['score'],
-        "alignment1": parts[0],
-        "alignment2": parts[2],
-        "matches": parts[1],
+        "alignment1": alignment['aligned_a'],
+        "alignment2": alignment['aligned_b'],
+        "matches": alignment['match_line'],
         "seq1_start": alignment['range_summary']['seq_a_start'],  # 0-indexed
         "seq2_start": alignment['range_summary']['seq_b_start'],  # 0-indexed
     }
 
+@app.get("/api/comparison/{id1}/{id2}")
+async def get_sequence_alignment(id1: str, id2: str):
+    # Alignment is CPU bound; the C kernel is called via ctypes, which
+    # releases the GIL, so a worker thread keeps the event loop free.
+    return await run_in_threadpool(_compare_proteins, id1, id2)
+
 @app.get("/api/proteins")
 async def get_sequences():
     """Return the first 20 proteins from the FASTA file."""
-    protein_iterator = sequences.read_fasta_sequences()
-    proteins = []
-    for _ in range(20):
-        try:
-            record = next(protein_iterator)
-            proteins.append((record.description, str(record.seq)))
-        except StopIteration:
-            break
-    return proteins
+    return sequences.first_fasta_sequences(20)
 
 @app.get("/api/sequence/{identifier}")
 async def get_sequence(identifier: str):
@@ -236,8 +407,7 @@ async def get_sequence(identifier: str):
             raise HTTPException(status_code=404, detail="Sequence not found")
         return {"header": sequence_data.name, "sequence": sequence_data.full.sequence}
     else:
-        sequence_iterator = sequences.read_fasta_sequences()
-        sequence_data = sequences.get_sequence_by_identifier(identifier, sequence_iterator)
+        sequence_data = sequences.get_fasta_record(identifier)
 
     if not sequence_data:
         raise HTTPException(status_code=404, detail="Sequence not found")
@@ -265,11 +435,23 @@ async def get_uniprot_json(accession: str):
 # --- Web UI Routes ---
 
 
-def _get_doc_list() -> list:
-    """Get list of available documentation files."""
-    docs_path = PROJECT_ROOT / "docs"
-    if not docs_path.exists():
-        return []
+# The doc list only changes when files are added, removed or renamed, and
+# each of those bumps the mtime of the containing directory.
+_doc_list_cache = {"signature": None, "docs": [], "json": "[]"}
+
+def _docs_signature(docs_path: Path) -> tuple:
+    """mtimes of the docs directory and every directory below it."""
+    signature = []
+    pending = [str(docs_path)]
+    while pending:
+        directory = pending.pop()
+        signature.append((directory, os.stat(directory).st_mtime_ns))
+        with os.scandir(directory) as entries:
+            pending.extend(entry.path for entry in entries if entry.is_dir())
+    return tuple(sorted(signature))
+
+def _scan_doc_list(docs_path: Path) -> list:
+    """Walk the docs directory for .md files."""
     docs = []
     for file in docs_path.rglob("*.md"):
         relative_path = file.relative_to(docs_path)
@@ -283,22 +465,45 @@ def _get_doc_list() -> list:
         x['filename']
     ))
 
+def _get_doc_list() -> list:
+    """Get list of available documentation files."""
+    docs_path = PROJECT_ROOT / "docs"
+    if not docs_path.exists():
+        return []
+    signature = _docs_signature(docs_path)
+    if signature != _doc_list_cache["signature"]:
+        docs = _scan_doc_list(docs_path)
+        _doc_list_cache.update(
+            signature=signature,
+            docs=docs,
+            json=json.dumps(docs, indent=2)
+        )
+    return _doc_list_cache["docs"]
+
 @app.get("/api/docs")
 async def list_docs():
     """List available documentation files."""
     return _get_doc_list()
 
+# Digest of the doclist.js content last known to be on disk
+_doclist_digest = None
+
 @app.get("/docs/doclist.js")
 async def get_document_list():
     """Serve the document list, updating the file only if it has changed."""
+    global _doclist_digest
     docs_path = PROJECT_ROOT / "docs"
     doclist_path = docs_path / "doclist.js"
     
-    # Get current docs and generate JS content
-    docs = _get_doc_list()
-    docs_json = json.dumps(docs, indent=2)
-    new_content = f'{docs_json}'
-    
+    # Get current docs; their JSON rendering is cached alongside them
+    _get_doc_list()
+    new_content = _doc_list_cache["json"]
+    new_digest = hashlib.blake2b(new_content.encode()).digest()
+
+    # Usual case: same list as the file we already checked or wrote
+    if new_digest == _doclist_digest and doclist_path.exists():
+        return FileResponse(doclist_path, media_type="application/javascript")
+
     # Read existing file if it exists
     existing_content = ""
     if doclist_path.exists():
@@ -309,6 +514,7 @@ async def get_document_list():
         doclist_path.parent.mkdir(parents=True, exist_ok=True)
         doclist_path.write_text(new_content)
         logger.info("Updated doclist.js")
+    _doclist_digest = new_digest
     
     return FileResponse(doclist_path, media_type="application/javascript")
 
@@ -324,18 +530,15 @@ async def get_favicon():
 
 @app.get("/{page}")
 async def read_page(page: str):
-    page = safe_filename(page)
-    return FileResponse(PROJECT_ROOT / f'static/{page}')
+    return FileResponse(listed_file(PROJECT_ROOT / 'static', page))
 
 @app.get("/panels/{file}")
 async def get_part_for_html_page(file: str):
-    file = safe_filename(file)
-    return FileResponse(PROJECT_ROOT / f'static/panels/{file}')
+    return FileResponse(listed_file(PROJECT_ROOT / 'static/panels', file))
 
 @app.get("/findings/{file}")
 async def get_findings_file(file: str):
-    file = safe_filename(file)
-    return FileResponse(PROJECT_ROOT / f'findings/{file}')
+    return FileResponse(listed_file(PROJECT_ROOT / 'findings', file))
 
 @app.get("/docs/{file:path}")
 async def get_document(file: str):
@@ -360,8 +563,12 @@ if __name__ == "__main__":
                         help='Port to bind the server to (default: 8002)')
     parser.add_argument('--reload', action='store_true',
                         help='Enable auto-reload for development')
+    # Jobs are held in memory by this process's JobManager, so extra workers
+    # would each see a different set of jobs. Keep 1 unless that changes.
     parser.add_argument('--workers', type=int, default=1,
-                        help='Number of worker processes (default: 1)')
+                        help='Number of worker processes (default: 1). Jobs live in '
+                             'the worker that created them, so more than 1 only suits '
+                             'read-only use. --reload always runs a single worker.')
     parser.add_argument('--log-level', type=str, 
                         choices=['critical', 'error', 'warning', 'info', 'debug'],
                         default='info',
@@ -370,6 +577,7 @@ if __name__ == "__main__":
     args = parser.parse_args()
     
     import uvicorn
+
     logger.info(f"Starting REST server on http://{args.host}:{args.port}")
     uvicorn.run(
         "web_server:app",
@@ -377,5 +585,6 @@ if __name__ == "__main__":
         port=args.port,
         reload=args.reload,
         workers=args.workers if not args.reload else 1,  # reload only works with 1 worker
-        log_level=args.log_level
+        log_level=args.log_level,
+        backlog=2048
     )
@@ -2,6 +2,14 @@ let currentJobId = null;
 let currentJobType = null;
 let pollTimer = null;
 let pollInterval = 1000;
+// Live status is pushed over Server-Sent Events where the browser has them;
+// polling every pollInterval is the fallback.
+let eventSource = null;
+let useEvents = typeof EventSource !== 'undefined';
+// Fallback polling backs off while the job reports no change
+const maxPollDelay = 30000;
+let pollDelay = pollInterval;
+let lastUpdateSeen = null;
 let log = document.getElementById('log');
 
 // --- Logging ---
@@ -191,17 +199,70 @@ function selectJob(jobId, jobType) {
   pollJobStatus();
 }
 
+function isLiveStatus(status) {
+  return ['running', 'initializing'].includes(status);
+}
+
+function stopJobEvents() {
+  if(eventSource) {
+    eventSource.close();
+    eventSource = null;
+  }
+}
+
+function watchJobEvents(jobId) {
+  stopJobEvents();
+  const source = new EventSource(`/api/job/${jobId}/events`);
+  eventSource = source;
+  let lastStatus = null;
+  let lastRefresh = 0;
+  // The first message is the whole state; later ones only the fields
+  // that changed, merged in here.
+  const data = {};
+
+  source.onmessage = (e) => {
+    Object.assign(data, JSON.parse(e.data));
+    updateDisplay(data);
+    // The job list shows progress too, so it is refreshed on a status
+    // change and otherwise at most once per poll interval, as polling did.
+    const now = Date.now();
+    if(data.status !== lastStatus || now - lastRefresh >= pollInterval) {
+      lastStatus = data.status;
+      lastRefresh = now;
+      refreshJobs();
+    }
+    if(!isLiveStatus(data.status)) stopJobEvents();
+  };
+  source.onerror = () => {
+    if(eventSource !== source) return;
+    stopJobEvents();
+    useEvents = false;
+    addLog('Live updates unavailable, falling back to polling.', 'error');
+    pollJobStatus();
+  };
+}
+
 async function pollJobStatus() {
   if(pollTimer) clearTimeout(pollTimer);
+  stopJobEvents();
   if(!currentJobId) return;
 
   try {
     refreshJobs();
     const data = await apiCall(`/api/job/${currentJobId}/status`);
     updateDisplay(data);
-    if(pollInterval > 0 && ['running', 'initializing'].includes(data
-        .status)) {
-      pollTimer = setTimeout(pollJobStatus, pollInterval);
+    if(pollInterval > 0 && isLiveStatus(data.status)) {
+      if(useEvents) {
+        watchJobEvents(currentJobId);
+      } else {
+        if(data.last_update === lastUpdateSeen) {
+          pollDelay = Math.min(pollDelay * 1.5, maxPollDelay);
+        } else {
+          pollDelay = pollInterval;
+          lastUpdateSeen = data.last_update;
+        }
+        pollTimer = setTimeout(pollJobStatus, pollDelay);
+      }
     }
   } catch (e) {
     if(e.message.includes('404')) {
@@ -213,13 +274,34 @@ async function pollJobStatus() {
   }
 }
 
+// Elements updateDisplay writes to, looked up once. Panels are swapped in
+// and out, so an element is looked up again once it leaves the document.
+const displayEls = {};
+
+function displayEl(id) {
+  let el = displayEls[id];
+  if(!el || !el.isConnected) {
+    el = document.getElementById(id);
+    displayEls[id] = el;
+  }
+  return el;
+}
+
+// Set innerHTML only when it differs from what was last set here, so
+// status updates that change nothing cost no re-parse or layout.
+function setHtmlIfChanged(el, html) {
+  if(el.renderedHtml === html) return;
+  el.innerHTML = html;
+  el.renderedHtml = html;
+}
+
 function updateDisplay(data) {
-  const configureButton = document.getElementById('configureButton');
+  const configureButton = displayEl('configureButton');
   if(configureButton) {
-    if(['running', 'completed', 'failed', 'cancelled'].includes(data.status)) {
-      configureButton.textContent = 'View';
-    } else {
-      configureButton.textContent = 'Configure';
+    const label = ['running', 'completed', 'failed', 'cancelled'].includes(
+      data.status) ? 'View' : 'Configure';
+    if(configureButton.textContent !== label) {
+      configureButton.textContent = label;
     }
   }
 
@@ -243,11 +325,12 @@ function updateDisplay(data) {
   // However, `setStatus` updates `#detailDiv`. If that div is in the DOM (in the modal), it gets updated.
   // The original code copied `iframe.contentWindow.document.getElementById('detailDiv').innerHTML` to `job-details`.
 
-  const configDetailDiv = document.getElementById('detailDiv');
-  const mainDetailDiv = document.getElementById('job-details');
+  const configDetailDiv = displayEl('detailDiv');
+  const mainDetailDiv = displayEl('job-details');
 
   if(configDetailDiv && mainDetailDiv) {
-    mainDetailDiv.innerHTML = configDetailDiv.innerHTML;
+    setHtmlIfChanged(mainDetailDiv,
+      configDetailDiv.renderedHtml ?? configDetailDiv.innerHTML);
   } else if(mainDetailDiv) {
     // If we don't have the config loaded, we can't show specific details unless we replicate the logic here.
     // Or we load the config partial invisibly?
@@ -261,6 +344,7 @@ function updatePollInterval() {
   if(!select) return;
 
   pollInterval = parseInt(select.value);
+  pollDelay = pollInterval;
   const status = document.getElementById('pollStatus');
   if(status) {
     status.textContent = pollInterval === 0 ? 'Polling: Disabled' :
@@ -2,13 +2,13 @@
 window.setStatus = function(data) {
   const detailDiv = document.getElementById('detailDiv');
   if(!detailDiv) return;
-  detailDiv.innerHTML = `
+  setHtmlIfChanged(detailDiv, `
         <div class="stat">Proteins: <span id="proteins">${data.total_proteins || 0}</span></div>
         <div class="stat">Progress: <span id="pairs">${data.processed_pairs || 0}</span> / <span id="totalPairs">${data.total_pairs || 0}</span> pairs</div>
         <div class="stat">Time: <span id="elapsed">${Math.round(data.elapsed_time || 0)}</span>s</div>
         <div class="stat">Memory: CPU <span id="cpuMem">${Math.round(data.memory_usage_mb || 0)}</span>MB</div>
         <div class="stat">Bridges found: <span id="bridges">${data.bridges_found || 0}</span></div>
-    `;
+    `);
 }
 
 window.saveConfigComputation = function() {
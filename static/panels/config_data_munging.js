@@ -28,7 +28,7 @@ window.setStatus = function(data) {
       .join('');
   }
 
-  detailDiv.innerHTML = `
+  setHtmlIfChanged(detailDiv, `
         <p><strong>Sequences Examined:</strong> <span id="sequences-examined">${data.sequences_examined || 0}</span></p>
         <p><strong>Proteins Processed:</strong> <span id="proteins-processed">${data.proteins_processed || 0}</span></p>
         <p><strong>Most Recent Item:</strong> <span id="most-recent-item">${data.most_recent_item || '-'}</span></p>
@@ -36,5 +36,5 @@ window.setStatus = function(data) {
         <ul id="last-ten-accepted">
             ${acceptedItemsHtml}
         </ul>
-    `;
+    `);
 }
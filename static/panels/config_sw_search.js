@@ -30,10 +30,10 @@ window.setStatus = function(data) {
     outputLogHtml = data.output_log.map(item => `<li>${item}</li>`).join('');
   }
 
-  detailDiv.innerHTML = `
+  setHtmlIfChanged(detailDiv, `
         <h3>Output Log (last 10 lines):</h3>
         <ul id="output-log" class="log-output">
             ${outputLogHtml}
         </ul>
-    `;
+    `);
 }
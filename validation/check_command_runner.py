@@ -7,11 +7,30 @@ This demonstrates how to:
 3. Provide both standalone and job-managed execution
 """
 
+import itertools
+import sys
 import threading
 import time
+from collections import deque
 from typing import Dict, Any, Optional
 from command_runner import CommandRunner, OutputFilter, DisplayMode
 
+# run() folds output into the job state once per this many lines, or per
+# this many seconds, whichever comes first
+FLUSH_LINES = 64
+FLUSH_SECONDS = 0.1
+
+# Output categories: the filter prefixes' plus 'other'
+CATEGORIES = tuple(sys.intern(category) for category in ('stats', 'hits', 'bench', 'other'))
+
+# Lines kept per output category - more hits, fewer stats
+BUFFER_SIZES = {
+    'stats': 10,   # Only keep last 10 stats
+    'hits': 100,   # Keep last 100 hits
+    'bench': 20,   # Keep last 20 benchmarks
+    'other': 10,
+}
+
 class SwSearchJobWithFiltering:
     """
     Example integration of enhanced CommandRunner with a Job.
@@ -32,11 +51,11 @@ class SwSearchJobWithFiltering:
             "progress": "No Progress Info",
             "errors": [],
             
-            # Buffered outputs by category
-            "stats_buffer": [],
-            "hits_buffer": [],
-            "bench_buffer": [],
-            "other_buffer": [],
+            # Buffered outputs by category, bounded like the runner's
+            "stats_buffer": deque(maxlen=BUFFER_SIZES['stats']),
+            "hits_buffer": deque(maxlen=BUFFER_SIZES['hits']),
+            "bench_buffer": deque(maxlen=BUFFER_SIZES['bench']),
+            "other_buffer": deque(maxlen=BUFFER_SIZES['other']),
             
             # Latest line for each category (for quick status)
             "latest_stats": None,
@@ -50,27 +69,61 @@ class SwSearchJobWithFiltering:
         }
         self.lock = threading.Lock()
         self.runner = None
+        self.runner_alive = False
+        self.start_monotonic = None  # Set by start(), for elapsed_time
+        # Cleared while paused, so run() can wait on it instead of polling
+        self.resume_event = threading.Event()
+        self.resume_event.set()
+        # Set when run() finishes, however it finishes
+        self.done_event = threading.Event()
+        # State keys per output category, built once rather than per flush.
+        # Only categories that the state has a key for are included.
+        self.counter_keys = {category: sys.intern(f"total_{category}_lines")
+                             for category in CATEGORIES
+                             if f"total_{category}_lines" in self.state}
+        self.latest_keys = {category: sys.intern(f"latest_{category}")
+                            for category in CATEGORIES
+                            if f"latest_{category}" in self.state}
+        # state['status'] as a plain attribute, for run()'s per-line checks
+        self.status = self.state['status']
 
+    # The state is copy-on-write: writers build a new dict and swap it in,
+    # so a published state is never changed and readers need no lock or
+    # copy. The lock only stops concurrent writers losing each other's
+    # changes.
     def update(self, **kwargs):
         """Thread-safe state update"""
         with self.lock:
-            self.state.update(kwargs)
+            self.state = {**self.state, **kwargs}
+            if 'status' in kwargs:
+                self.status = kwargs['status']
 
     def get_state(self):
-        """Thread-safe state retrieval"""
-        with self.lock:
-            return self.state.copy()
+        """
+        The current state, with elapsed_time worked out here, at the rate
+        the state is read, rather than kept up to date by run().
+        """
+        state = self.state
+        if self.start_monotonic is None:
+            return state
+        return {**state, 'elapsed_time': time.monotonic() - self.start_monotonic}
 
     def configure(self, config: Dict[str, Any]):
         """Configure the job"""
         with self.lock:
-            self.state['config'].update(config)
+            self.state = {**self.state, 'config': {**self.state['config'], **config}}
 
     def start(self):
         """Start the job"""
         if self.state['status'] not in ['created', 'paused']:
             return
         
+        if self.state['status'] == 'paused':
+            # Already running, just blocked on resume_event
+            self.resume()
+            return
+
+        self.start_monotonic = time.monotonic()
         self.update(status="running", start_time=time.time())
         thread = threading.Thread(target=self.run, daemon=True)
         thread.start()
@@ -91,83 +144,109 @@ class SwSearchJobWithFiltering:
                 'bench': 'BENCH:'
             }
             
-            # Buffer sizes - keep more hits, fewer stats
-            buffer_sizes = {
-                'stats': 10,   # Only keep last 10 stats
-                'hits': 100,   # Keep last 100 hits
-                'bench': 20    # Keep last 20 benchmarks
-            }
-            
             # Create runner with custom configuration
             self.runner = CommandRunner(
                 command,
                 log_error_callback=self._log_error,
                 filter_prefixes=filter_prefixes,
-                buffer_sizes=buffer_sizes
+                buffer_sizes=BUFFER_SIZES
             )
             
             self.update(current_step="Starting process")
             self.runner.start(cwd=config.get('cwd'))
+            self.runner_alive = True
             
             self.update(current_step="Processing output")
             
-            # Process output and update job state
+            # Process output and update job state. Counts and latest lines
+            # are gathered in locals and folded into the state in batches,
+            # rather than taking the lock on every line.
+            counters = dict.fromkeys(CATEGORIES, 0)
+            latest = {}
+            pending = 0
+            last_flush = time.monotonic()
             for category, line in self.runner.read_output_filtered():
-                # Update counters
-                counter_key = f"total_{category}_lines"
-                if counter_key in self.state:
-                    with self.lock:
-                        self.state[counter_key] += 1
-                
-                # Update latest for each category
-                latest_key = f"latest_{category}"
-                if latest_key in self.state:
-                    self.update(**{latest_key: line})
-                
-                # Update progress based on stats lines
-                if category == 'stats':
-                    self.update(progress=line)
+                counters[category] += 1
+                latest[category] = line
+                pending += 1
+                now = time.monotonic()  # the one clock read per line
+                if pending >= FLUSH_LINES or now - last_flush >= FLUSH_SECONDS:
+                    self._flush_output(counters, latest)
+                    pending = 0
+                    last_flush = now
                 
-                # Check if job should be paused/cancelled
-                if self.state['status'] == 'paused':
+                # Check if job should be paused/cancelled, reading the
+                # status once (and again only after a pause)
+                status = self.status
+                if status == 'paused':
+                    self._flush_output(counters, latest)
                     self.runner.pause()
-                    while self.state['status'] == 'paused':
-                        time.sleep(0.5)
+                    self.resume_event.wait()
                     self.runner.resume()
+                    status = self.status
                 
-                if self.state['status'] == 'cancelled':
+                if status == 'cancelled':
                     self.runner.terminate()
+                    self.runner_alive = False
                     break
+            else:
+                # Output drained: the process has exited
+                self.runner_alive = False
+
+            self._flush_output(counters, latest)
             
             # Job completed - sync final buffers to state
             self._sync_buffers_to_state()
             
-            if self.state['status'] != 'cancelled':
+            if self.status != 'cancelled':
                 self.update(status="completed", current_step="Finished")
                 
         except Exception as e:
             self._log_error(f"Job failed: {e}")
             self.update(status="failed", errors=self.state['errors'] + [str(e)])
         finally:
-            if self.runner:
+            # Only a process still running (e.g. after an exception) needs
+            # stopping; a finished or cancelled one has been dealt with
+            if self.runner and self.runner_alive:
                 self.runner.terminate()
+            self.done_event.set()
+
+    def _flush_output(self, counters, latest):
+        """Fold the line counts and latest lines batched up by run() into the state"""
+        with self.lock:
+            state = dict(self.state)
+            for category, count in counters.items():
+                counter_key = self.counter_keys.get(category)
+                if count and counter_key:
+                    state[counter_key] += count
+                counters[category] = 0
+            for category, line in latest.items():
+                latest_key = self.latest_keys.get(category)
+                if latest_key:
+                    state[latest_key] = line
+            # Progress is based on stats lines
+            if 'stats' in latest:
+                state['progress'] = latest['stats']
+            self.state = state
+        latest.clear()
 
     def _sync_buffers_to_state(self):
         """Copy buffered output from runner to job state for web access"""
         if not self.runner:
             return
         
-        buffers = self.runner.get_buffers()
-        with self.lock:
-            for category, lines in buffers.items():
-                buffer_key = f"{category}_buffer"
-                if buffer_key in self.state:
-                    self.state[buffer_key] = lines
+        # The runner's own deques, not list copies. They are only synced
+        # once the output has been read, after which nothing appends to them.
+        # Built outside the lock, then swapped in with a single update
+        new_buffers = {f"{category}_buffer": lines
+                       for category, lines in self.runner.output_filter.buffers.items()
+                       if f"{category}_buffer" in self.state}
+        self.update(**new_buffers)
 
     def _log_error(self, message: str):
         """Add error to job state"""
         with self.lock:
-            self.state['errors'].append(message)
+            self.state = {**self.state, 'errors': self.state['errors'] + [message]}
 
     def get_filtered_output(self, category: str, limit: Optional[int] = None):
         """
@@ -181,14 +260,15 @@ class SwSearchJobWithFiltering:
             List of lines for the requested category
         """
         buffer_key = f"{category}_buffer"
-        with self.lock:
-            lines = self.state.get(buffer_key, [])
-            if limit:
-                return lines[-limit:]
-            return lines
+        lines = self.state.get(buffer_key, ())
+        if limit:
+            # Only the last `limit` lines are copied out of the deque
+            return list(itertools.islice(lines, max(0, len(lines) - limit), None))
+        return list(lines)
 
     def pause(self):
         """Pause the job and its runner"""
+        self.resume_event.clear()
         self.update(status="paused")
         if self.runner:
             self.runner.pause()
@@ -196,12 +276,15 @@ class SwSearchJobWithFiltering:
     def resume(self):
         """Resume the job and its runner"""
         self.update(status="running")
+        self.resume_event.set()
         if self.runner:
             self.runner.resume()
 
     def terminate(self):
         """Terminate the job and its runner"""
         self.update(status="cancelled")
+        # Wake a paused run() so that it sees the cancel
+        self.resume_event.set()
         if self.runner:
             self.runner.terminate()
 
@@ -241,8 +324,7 @@ def standalone_example():
     # runner.run_simple(display_mode='hits')
     
     # Wait for completion
-    while runner.is_running():
-        time.sleep(0.1)
+    runner.wait()
     
     # Show what was captured
     buffers = runner.get_buffers()
@@ -282,7 +364,7 @@ def job_managed_example():
     
     # Monitor progress (simulating what web interface would do)
     last_status = None
-    while job.state['status'] == 'running':
+    while True:
         state = job.get_state()
         
         # Show progress updates
@@ -294,7 +376,9 @@ def job_managed_example():
         if state['latest_hit']:
             print(f"  {state['latest_hit']}")
         
-        time.sleep(1)
+        # Returns as soon as the job finishes, rather than a second later
+        if job.done_event.wait(timeout=1):
+            break
     
     # Job finished - show results
     final_state = job.get_state()
@@ -316,8 +400,6 @@ def job_managed_example():
 
 
 if __name__ == "__main__":
-    import sys
-    
     # Create test script first
     from command_runner import create_test_script
     create_test_script()
@@ -27,7 +27,7 @@ for querying "show me all proteins matching criteria X".
 """
 
 def test_filter_for_mouse_proteins():
-    all_records = read_swissprot_sequences()
+    all_records = read_swissprot_sequences(organisms=['Mus musculus'])
 
     # Correctly call the generator and convert to a list
     mouse_proteins = list(filter_proteins(all_records, organisms=['mouse']))
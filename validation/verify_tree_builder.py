@@ -1,26 +1,28 @@
 import sys
 import os
 import csv
-from types import SimpleNamespace
+import functools
 import difflib
+import tempfile
+from unittest.mock import patch
 import sequences
 
-# Mock sequences module
-class MockSequences:
-    def get_protein(self, number):
-        ns = SimpleNamespace()
-        ns.name = f"Protein_{number}"
-        ns.id = f"P{number}"
-        ns.entry = f"ENTRY_{number}"
-        ns.sequence_length = 100 + number
-        return ns
-
-# Inject mock into sys.modules so tree_builder imports it
-# sys.modules['sequences'] = MockSequences()
+class _MockProtein:
+    __slots__ = ('name', 'id', 'entry', 'sequence_length')
 
-# Monkey patch sequences.get_protein which is imported by tree_builder
-sequences.get_protein = MockSequences().get_protein
+    def __init__(self, number):
+        self.name = f"Protein_{number}"
+        self.id = f"P{number}"
+        self.entry = f"ENTRY_{number}"
+        self.sequence_length = 100 + number
 
+# Mock sequences module
+class MockSequences:
+    # tree_builder asks for the same node many times; build each mock once.
+    @staticmethod
+    @functools.lru_cache(maxsize=None)
+    def get_protein(number):
+        return _MockProtein(number)
 
 import tree_builder
 
@@ -99,11 +101,17 @@ def create_sparse_links(filename):
         writer.writerows(links)
 
 def run_test():
-    input_file = "test_links_temp.csv"
-    output_file_py = "test_tree_py.txt"
-    output_file_cpp = "test_tree_cpp.txt"
-    report_py = "test_report_py.txt"
-    report_cpp = "test_report_cpp.txt"
+    # Scratch files live in a temporary directory, RAM-backed where /dev/shm exists.
+    scratch_root = '/dev/shm' if os.path.isdir('/dev/shm') else None
+    with tempfile.TemporaryDirectory(dir=scratch_root) as scratch_dir:
+        run_test_in(scratch_dir)
+
+def run_test_in(scratch_dir):
+    input_file = os.path.join(scratch_dir, "test_links_temp.csv")
+    output_file_py = os.path.join(scratch_dir, "test_tree_py.txt")
+    output_file_cpp = os.path.join(scratch_dir, "test_tree_cpp.txt")
+    report_py = os.path.join(scratch_dir, "test_report_py.txt")
+    report_cpp = os.path.join(scratch_dir, "test_report_cpp.txt")
 
     # --- Test 1: Standard Logic Verification ---
     print("--- Test 1: Verification of Tree Logic ---")
@@ -189,17 +197,8 @@ def run_test():
     else:
         print("\nOVERALL FAILURE: One or more checks failed.")
 
-    # Clean up
-    if os.path.exists(input_file):
-        os.remove(input_file)
-    if os.path.exists(output_file_py):
-        os.remove(output_file_py)
-    if os.path.exists(output_file_cpp):
-        os.remove(output_file_cpp)
-    if os.path.exists(report_py):
-        os.remove(report_py)
-    if os.path.exists(report_cpp):
-        os.remove(report_cpp)
-
 if __name__ == "__main__":
-    run_test()
+    # tree_builder looks up sequences.get_protein at call time, so the mock
+    # only needs to be in place while the checks run.
+    with patch.object(sequences, 'get_protein', MockSequences().get_protein):
+        run_test()